@@ -17,27 +17,69 @@ Released under the Apache License 2.0
 import datetime
 import logging
 from logging import NullHandler
-import platform
-import random
 import re
 import sys
-from typing import Optional, Union
+from typing import List, Optional, Set, Tuple, Union
 
 from compatibility import messages
 
-logging.getLogger('compatibility').addHandler(NullHandler())
+# Log through the package's own logger. Calling the module-level functions of
+# logging would use the root logger and configure it, if the application
+# has not done so yet.
+logger = logging.getLogger('compatibility')
+logger.addHandler(NullHandler())
+
+# Regular expression describing a valid version string provided by the user.
+# Check itself parses those strings without it (see Check.__parse_version),
+# but it is kept as part of the public interface.
+# The outer group is non-capturing, as only the named groups are of interest.
+VERSION_REGEX = re.compile(
+    r"(?P<major>\d+)\.(?P<minor>\d+)(?:\.(?P<releaselevel>alpha|beta|candidate|final))?")
+
+# Release levels allowed as third part of a version string
+_RELEASELEVELS = frozenset({'alpha', 'beta', 'candidate', 'final'})
+
+# Keys required in the parameter python_version_support
+_PYTHON_VERSION_SUPPORT_KEYS = frozenset(
+    {'incompatible_versions', 'max_tested_version', 'min_version'})
+
+# Allowed keys and values in the parameter system_support
+_VALID_SYSTEM_KEYS = frozenset({'full', 'partial', 'incompatible'})
+_VALID_SYSTEMS = frozenset({'Linux', 'Windows', 'MacOS'})
+
+# Types of parameter values that Check.__cache_key can read without
+# consuming them, unlike e.g. a generator.
+_CACHEABLE_TYPES = (str, list, tuple, set, frozenset)
+
+# Cache keys (see Check.__cache_key) of parameters which already passed
+# the checks run by Check.__init__ in this process.
+_PASSED_CHECKS: Set[tuple] = set()
+
+# The version of the running interpreter does not change during the lifetime
+# of the process, so read it once.
+_RUNNING_VERSION = (sys.version_info.major, sys.version_info.minor)
+_RUNNING_SHORT = f"{_RUNNING_VERSION[0]}.{_RUNNING_VERSION[1]}"
+_RUNNING_FULL = f"{_RUNNING_SHORT}.{sys.version_info.releaselevel}"
+
+
+def _running_system() -> str:
+    "Return the name of the operating system running this code."
+    # deferred for performance
+    import platform  # pylint: disable=import-outside-toplevel
+    return platform.system()
 
 
 class Check():
     """Main Class of the compatibility package: check Python version
        and time since release."""
     # pylint: disable=too-many-arguments
-    # pylint: disable=too-many-locals
+
+    # Check has a fixed set of attributes, so slots save the instance dict.
+    __slots__ = ('package_name', 'package_version', 'release_date',
+                 'language_messages', '_msg')
 
     # Regular expression to parse a version string provided by the user
-    # ?? is the non-greedy version of ?
-    VERSION_REGEX = re.compile(
-        r"(?P<major>\d+)\.(?P<minor>\d+)(\.(?P<releaselevel>\b(alpha|beta|candidate|final)\b))??")
+    VERSION_REGEX = VERSION_REGEX
 
     # Messages to log in different languages
     MSG = messages.messages
@@ -55,33 +97,129 @@ class Check():
         self.release_date = self.__coerce_date(release_date)
         self.language_messages = language_messages.strip()
         self.check_params()
-        self.check_python_version(python_version_support)
-        self.check_system(system_support)
-        self.log_version_info()
+        # Resolve the messages in the chosen language once, so every log
+        # call needs a single lookup. Read them from self.MSG, so a subclass
+        # can change or translate them.
+        self._msg = {key: texts[self.language_messages]
+                     for key, texts in self.MSG.items()}
+        # The results of the following checks only depend on the parameters,
+        # so they do not have to run again, if a Check with the very same
+        # parameters already passed them in this process.
+        running_system = _running_system() if system_support else None
+        cache_key = self.__cache_key(
+            python_version_support, system_support, running_system)
+        if cache_key is None or cache_key not in _PASSED_CHECKS:
+            # Both checks return immediately without a parameter, so skip
+            # the method calls in that case.
+            if python_version_support:
+                self.check_python_version(python_version_support)
+            if system_support:
+                self.check_system(system_support, running_system)
+            self.log_version_info()
+            if cache_key is not None:
+                _PASSED_CHECKS.add(cache_key)
+        # The age of the release changes over time, so always check it.
         if nag_over_update:
             self.check_version_age(nag_over_update)
 
+    @staticmethod
+    def clear_cache() -> None:
+        """Forget which parameters already passed the checks, so the next
+           Check runs all of them again."""
+        _PASSED_CHECKS.clear()
+
+    def __cache_key(self,
+                    python_version_support: Optional[dict],
+                    system_support: Optional[dict],
+                    running_system: Optional[str]) -> Optional[tuple]:
+        """Build a hashable key from all parameters that influence the result
+           of the checks run in __init__. Return None if one of them cannot
+           be hashed or is not of a type in _CACHEABLE_TYPES, because reading
+           a one-shot iterable here would leave nothing for the checks. Then
+           the result is not cached and the checks see the unchanged value.
+           The type of each value is part of the key, because the checks
+           reject e.g. a list where they expect a set with the same items.
+           The result of check_system also depends on the running system.
+           It does not change either, but tests commonly replace
+           platform.system, so it is part of the key as well."""
+        frozen: List[Optional[frozenset]] = []
+        for parameter in (python_version_support, system_support):
+            if not parameter:
+                frozen.append(None)
+                continue
+            try:
+                items = parameter.items()
+            except AttributeError:
+                return None
+            if not all(isinstance(value, _CACHEABLE_TYPES)
+                       for _, value in items):
+                return None
+            try:
+                frozen.append(frozenset(
+                    (key, type(value),
+                     value if isinstance(value, str) else frozenset(value))
+                    for key, value in items))
+            except TypeError:
+                return None
+        return (self.package_name, self.package_version, self.release_date,
+                self.language_messages, *frozen, running_system)
+
     @staticmethod
     def __coerce_date(date_to_coerce: Union[str, datetime.date]) -> datetime.date:
         """Convert a string in the format YYYY-MM-DD to datetime.date.
            This doubles as a check if the date is valid.
            If the object is already of type datetime.date, just return it.
+           A datetime.datetime object is reduced to its date.
            Raise ValueError if invalid string or non-existent date.
            Raise AtributeError if neither string nor datetime.date"""
-        if type(date_to_coerce) == datetime.date:  # pylint: disable=unidiomatic-typecheck
-            return date_to_coerce
-
-        if type(date_to_coerce) == str:  # pylint: disable=unidiomatic-typecheck
+        if isinstance(date_to_coerce, str):
+            # Check the fixed format first: newer versions of
+            # date.fromisoformat also accept other ISO 8601 formats.
             try:
-                return datetime.datetime.strptime(date_to_coerce, '%Y-%m-%d').date()
+                digits = (date_to_coerce[0:4] + date_to_coerce[5:7] +
+                          date_to_coerce[8:10])
+                if (len(date_to_coerce) != 10 or date_to_coerce[4] != '-' or
+                        date_to_coerce[7] != '-' or not digits.isdecimal()):
+                    raise ValueError
+                # fromisoformat is a lot faster than strptime, but only
+                # exists since Python 3.7. Slice the string on Python 3.6.
+                if hasattr(datetime.date, 'fromisoformat'):
+                    return datetime.date.fromisoformat(date_to_coerce)
+                return datetime.date(int(date_to_coerce[0:4]),
+                                     int(date_to_coerce[5:7]),
+                                     int(date_to_coerce[8:10]))
             except ValueError as bad_date:
                 # standard error message is not useful
                 raise ValueError(
                     'Non-existing or incomplete date!') from bad_date
 
+        if isinstance(date_to_coerce, datetime.datetime):
+            return date_to_coerce.date()
+
+        if isinstance(date_to_coerce, datetime.date):
+            return date_to_coerce
+
         raise AttributeError(
             'date_to_coerce must be either string or datetime.date')
 
+    @staticmethod
+    def __parse_version(version_string: object) -> Optional[Tuple[int, int]]:
+        """Parse a version string like '3.8' or '3.8.final' and return the
+           major and minor version as integers. Accepts the same strings as
+           VERSION_REGEX, but the input is so small that splitting it is
+           cheaper than running the regular expression.
+           Return None if the input is not a string or cannot be parsed."""
+        if not isinstance(version_string, str):
+            return None
+        parts = version_string.split('.')
+        if len(parts) not in (2, 3):
+            return None
+        if not (parts[0].isdecimal() and parts[1].isdecimal()):
+            return None
+        if len(parts) == 3 and parts[2] not in _RELEASELEVELS:
+            return None
+        return int(parts[0]), int(parts[1])
+
     def check_params(self) -> None:
         "Check parameters used to initialize this class for completeness"
         # Parameters might be empty after applying .strip()
@@ -89,8 +227,10 @@ class Check():
             raise ValueError('Missing package name!')
         if not self.package_version:
             raise ValueError('Missing package version!')
-        # Is the message language supported?
-        if self.language_messages not in ('en', 'de'):
+        # Is the message language supported, i.e. is there a translation
+        # for every message?
+        if not all(self.language_messages in texts
+                   for texts in self.MSG.values()):
             raise ValueError('Invalid value for language_messages!')
 
     def check_python_version(self,
@@ -98,86 +238,72 @@ class Check():
                              ) -> None:
         """Check whether the running interpreter version is supported, i.e.
            equal or higher than the minimum version and not in the list of
-           incompatible versions. Warn with logging.warn if the running
+           incompatible versions. Warn with logger.warning if the running
            version is higher than the highest version used in tests."""
         if not python_version_support:
             # Setting python_version_support is not required
             return None
 
-        # Python version support: missing or additional keys
-        if len(python_version_support.keys()) < 3:
-            raise ValueError('Parameter python_version_support incomplete!')
-        if len(python_version_support.keys()) > 3:
-            raise ValueError('Parameter python_version_support: too many keys!')
-        # Are there the right keys?
-        expected_keys = ['incompatible_versions',
-                         'max_tested_version',
-                         'min_version']
-        found_keys = list(python_version_support.keys())
-        if sorted(found_keys) != expected_keys:
+        # Are there exactly the expected keys? Compare the keys view against
+        # a frozenset and only work out the reason if they differ.
+        found_keys = python_version_support.keys()
+        if found_keys != _PYTHON_VERSION_SUPPORT_KEYS:
+            if len(found_keys) < 3:
+                raise ValueError('Parameter python_version_support incomplete!')
+            if len(found_keys) > 3:
+                raise ValueError(
+                    'Parameter python_version_support: too many keys!')
             raise ValueError(
                 'Parameter python_version_support contains unknown keys.')
         # Do the Python versions parse?
-        # fullmatch instead of match, because with match something like 3.8.x
-        # would be recognized.
-        if not re.fullmatch(self.VERSION_REGEX, python_version_support['min_version']):
+        parsed_min = self.__parse_version(python_version_support['min_version'])
+        if not parsed_min:
             raise ValueError('Value for key min_version incorrect.')
-        if not re.fullmatch(self.VERSION_REGEX, python_version_support['max_tested_version']):
+        parsed_max = self.__parse_version(
+            python_version_support['max_tested_version'])
+        if not parsed_max:
             raise ValueError('Value for key max_tested_version incorrect.')
-        for version_string in python_version_support['incompatible_versions']:
-            if not re.fullmatch(self.VERSION_REGEX, version_string):
+        incompatible = frozenset(
+            python_version_support['incompatible_versions'])
+        for version_string in incompatible:
+            if not self.__parse_version(version_string):
                 raise ValueError(
                     'Some string in incompatible_versions cannot be parsed.')
-        major = sys.version_info.major
-        minor = sys.version_info.minor
-        releaselevel = sys.version_info.releaselevel
-        # construct strings to search for
-        short_version = f"{major}.{minor}"
-        full_version = f"{short_version}.{releaselevel}"
         # Is the running version equal or higher than the minimum required?
-        match_min = re.match(
-            self.VERSION_REGEX,
-            python_version_support['min_version'])
-        # The value was parsed before, so there is always a value for major_min
-        # and minor_min. So silence mypy for the next two lines:
-        major_min = int(match_min.group('major'))  # type: ignore[union-attr]
-        minor_min = int(match_min.group('minor'))  # type: ignore[union-attr]
-        if major < major_min or (major_min == major and minor < minor_min):
+        if _RUNNING_VERSION < parsed_min:
+            major_min, minor_min = parsed_min
             raise RuntimeError(
                 f"You need at least Python {major_min}.{minor_min} to run " +
-                f"{self.package_name}, but you are using {full_version}.")
+                f"{self.package_name}, but you are using {_RUNNING_FULL}.")
         # Check if the running version is in the list of incompatible versions
-        incompatible = python_version_support['incompatible_versions']
-        if short_version in incompatible or full_version in incompatible:
+        if _RUNNING_SHORT in incompatible or _RUNNING_FULL in incompatible:
             raise RuntimeError(
-                self.MSG['incompatible_version'][self.language_messages],
+                self._msg['incompatible_version'],
                 self.package_name)
         # Check if the running version is higher than the highest tested
-        match_h = re.match(
-            self.VERSION_REGEX,
-            python_version_support['max_tested_version'])
-        # Same as above. checked before, that there is always a value.
-        # Silence mypy for the next two lines:
-        major_h = int(match_h.group('major'))  # type: ignore[union-attr]
-        minor_h = int(match_h.group('minor'))  # type: ignore[union-attr]
-        if major_h > major or (major == major_h and minor > minor_h):
-            logging.warning(
-                self.MSG['untested_interpreter'][self.language_messages],
+        if _RUNNING_VERSION > parsed_max:
+            logger.warning(
+                self._msg['untested_interpreter'],
                 self.package_name)
         return None
 
     def check_system(self,
-                     system_support: Optional[dict]) -> None:
+                     system_support: Optional[dict],
+                     running_system: Optional[str] = None) -> None:
         """Check the operating system running this code: is it fully supported,
            only partially or is it known to be incompatible?
 
-        If the OS has only partial support => logging.warning
+        If the OS has only partial support => logger.warning
         If the OS is incompatible => RuntimeError exception
 
         system_support is a dictionary with three allowed keys:
         'full', 'partial', 'incompatible'.
-        The value for each key has to be a set containing any of these strings:
+        The value for each key has to be a set (or frozenset) containing any
+        of these strings:
         'Linux', 'MacOS', or 'Windows'
+
+        running_system is the result of platform.system(). If it is not
+        provided, it is determined here.
         """
         if not system_support:
             return None
@@ -186,55 +312,58 @@ class Check():
 
         # Are there only allowed categories and allowed values?
         for key, systems in system_support.items():
-            valid_keys = {'full', 'partial', 'incompatible'}
-            valid_systems = {'Linux', 'Windows', 'MacOS'}
-            if key not in valid_keys:
+            if key not in _VALID_SYSTEM_KEYS:
                 raise ValueError('Unknown key in dictionary system_support')
-            if not isinstance(systems, set):
+            if not isinstance(systems, (set, frozenset)):
                 raise ValueError(f"Use a set to hold values for {key}")
-            for system in systems:
-                if system not in valid_systems:
-                    raise ValueError(
-                        f"Invalid system in {key}. Allowed: {valid_systems}")
-
-        if 'full' in system_support and 'partial' in system_support:
-            for system in system_support['full']:
-                if system in system_support['partial']:
-                    raise ValueError(
-                        "Contradiction: system cannot simultaneously be " +
-                        "fully AND only partially supported.")
-
-        if 'full' in system_support and 'incompatible' in system_support:
-            if system in system_support['incompatible']:
-                raise ValueError("Contradiction: system cannot have full " +
-                                 "support AND be incompatible!")
-
-        running = platform.system()
-        if 'full' in system_support and running in system_support['full']:
-            logging.debug(
+            if systems - _VALID_SYSTEMS:
+                raise ValueError(
+                    f"Invalid system in {key}. Allowed: " +
+                    f"{', '.join(sorted(_VALID_SYSTEMS))}")
+
+        full = system_support.get('full', frozenset())
+        if full & system_support.get('partial', frozenset()):
+            raise ValueError(
+                "Contradiction: system cannot simultaneously be " +
+                "fully AND only partially supported.")
+        if full & system_support.get('incompatible', frozenset()):
+            raise ValueError("Contradiction: system cannot have full " +
+                             "support AND be incompatible!")
+
+        running = running_system or _running_system()
+        # Map each listed system to its level of support. Build it in reverse
+        # order of precedence, so 'full' overwrites 'partial' overwrites
+        # 'incompatible'.
+        system_to_level = {
+            system: level
+            for level in ('incompatible', 'partial', 'full')
+            for system in system_support.get(level, ())}
+        level = system_to_level.get(running)
+        if level == 'full':
+            logger.debug(
                 "%s fully supports %s.", self.package_name, running)
             return None
-        if 'partial' in system_support and running in system_support['partial']:
-            logging.warning(
+        if level == 'partial':
+            logger.warning(
                 "%s has only partial support on %s.", self.package_name, running)
             return None
-        if 'incompatible' in system_support and running in system_support['incompatible']:
+        if level == 'incompatible':
             msg = (f"This version of {self.package_name} is incompatible " +
                    f"with {running}!")
-            logging.exception(msg)
+            logger.exception(msg)
             raise RuntimeError(msg)
 
         # the running system does not appear
-        logging.info("%s's support for %s is unknown!",
-                     self.package_name, running)
+        logger.info("%s's support for %s is unknown!",
+                    self.package_name, running)
         return None
 
     def log_version_info(self) -> None:
         "Log a message with package name, version, and release date."
         # avoid logging info about itself in every package using it:
         if self.package_name != 'compatibility':
-            logging.info(
-                self.MSG['version_info'][self.language_messages],
+            logger.info(
+                self._msg['version_info'],
                 self.package_name,
                 self.package_version,
                 self.release_date)
@@ -256,12 +385,17 @@ class Check():
             raise ValueError('nag_in_hundred must be int between 0 and 100.')
         if nag_in_hundred == 0:
             return
+        # Roll the dice first: if the user is not going to be nagged anyway,
+        # there is no need to look at the clock.
+        if nag_in_hundred < 100:
+            # deferred for performance
+            import random  # pylint: disable=import-outside-toplevel
+            if random.randrange(100) >= nag_in_hundred:
+                return
         date_delta = datetime.date.today() - self.release_date
         days_since_release = date_delta.days
         if days_since_release >= nag_days_after_release:
-            probability = nag_in_hundred / 100
-            if probability == 1.0 or random.random() < probability:
-                logging.info(
-                    self.MSG['check_for_updates'][self.language_messages],
-                    self.package_name,
-                    days_since_release)
+            logger.info(
+                self._msg['check_for_updates'],
+                self.package_name,
+                days_since_release)
@@ -15,74 +15,108 @@ Source: https://github.com/RuedigerVoigt/compatibility
 Released under the Apache License 2.0
 """
 
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 import logging
 import platform
+import random
 import re
 import sys
-from unittest.mock import patch
 
 import compatibility
 import pytest
 
+# Instead of mocking, create version strings
+# relative to the one running the tests:
+MAJOR = sys.version_info.major
+MINOR = sys.version_info.minor
+RUNNING_VERSION_SHORT = f"{MAJOR}.{MINOR}"
+RUNNING_VERSION_LONG = f"{MAJOR}.{MINOR}.{sys.version_info.releaselevel}"
+VERSION_MINOR_ABOVE = f"{MAJOR}.{MINOR + 1}"
+VERSION_MAJOR_ABOVE = f"{MAJOR + 1}.{MINOR}"
 
-def test_missing_or_empty_paramameters():
-    "3 parameters are required, the other 3 have defaults."
-    # package name missing
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='',
-            package_version='1',
-            release_date=date(2021, 1, 1))
-    assert 'Missing package name!' in str(excinfo.value)
+# Release date used by most tests. date objects are immutable, so one
+# instance can be shared.
+RELEASE_DATE = date(2021, 1, 1)
 
-    # package name whitespace only
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='        ',
-            package_version='1',
-            release_date=date(2021, 1, 1))
-    assert 'Missing package name!' in str(excinfo.value)
 
-    # missing version
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='',
-            release_date=date(2021, 1, 1))
-    assert 'Missing package version!' in str(excinfo.value)
+@pytest.fixture(autouse=True)
+def clear_check_cache():
+    "Every test should run all checks, even if it reuses parameters."
+    compatibility.Check.clear_cache()
+
+
+@pytest.fixture(autouse=True)
+def log_level(caplog):
+    "Capture log messages of all levels."
+    caplog.set_level(logging.DEBUG)
 
+
+@pytest.fixture(scope="module")
+def check_factory():
+    """Return a function that runs Check with valid defaults for the three
+       required parameters. Keyword arguments add or override parameters."""
+    defaults = {'package_name': 'test',
+                'package_version': '1',
+                'release_date': RELEASE_DATE}
+
+    def factory(**parameters):
+        return compatibility.Check(**{**defaults, **parameters})
+    return factory
+
+
+@pytest.mark.parametrize("parameters,message", [
+    # package name missing
+    ({'package_name': '', 'package_version': '1',
+      'release_date': RELEASE_DATE},
+     'Missing package name!'),
+    # package name whitespace only
+    ({'package_name': '        ', 'package_version': '1',
+      'release_date': RELEASE_DATE},
+     'Missing package name!'),
+    # missing version
+    ({'package_name': 'test', 'package_version': '',
+      'release_date': RELEASE_DATE},
+     'Missing package version!'),
     # missing release date
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date='')
+    ({'package_name': 'test', 'package_version': '1',
+      'release_date': ''},
+     'Non-existing or incomplete date!'),
+])
+def test_missing_or_empty_paramameters(parameters, message):
+    "3 parameters are required, the other 3 have defaults."
+    with pytest.raises(ValueError, match=re.escape(message)):
+        compatibility.Check(**parameters)
 
 
-def test_languages():
-    # not supported language
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            language_messages='not-a-language')
-    assert 'Invalid value for language_messages!' in str(excinfo.value)
+def test_unsupported_language(check_factory):
+    with pytest.raises(ValueError, match='Invalid value for language_messages!'):
+        check_factory(language_messages='not-a-language')
 
-    # supported language: en
-    compatibility.Check(
-        package_name='test',
-        package_version='1',
-        release_date=date(2021, 1, 1),
-        language_messages='en')
 
-    # supported language: de
-    compatibility.Check(
-        package_name='test',
-        package_version='1',
-        release_date=date(2021, 1, 1),
-        language_messages='de')
+@pytest.mark.parametrize("language", ['en', 'de'])
+def test_languages(language, check_factory):
+    check_factory(language_messages=language)
+
+
+def test_subclass_messages(caplog):
+    "A subclass can replace the message texts through MSG."
+    class CustomCheck(compatibility.Check):
+        MSG = {**compatibility.Check.MSG,
+               'version_info': {'en': 'Custom info for %s %s (%s)',
+                                'de': 'Eigene Info zu %s %s (%s)'}}
+    CustomCheck(package_name='test', package_version='1',
+                release_date=RELEASE_DATE)
+    assert 'Custom info for test 1' in caplog.text
+
+
+def test_subclass_language(caplog):
+    "A language with a translation for every message can be used."
+    class CustomCheck(compatibility.Check):
+        MSG = {key: {**texts, 'xx': 'XX ' + texts['en']}
+               for key, texts in compatibility.Check.MSG.items()}
+    CustomCheck(package_name='test', package_version='1',
+                release_date=RELEASE_DATE, language_messages='xx')
+    assert 'XX You are using test in version 1' in caplog.text
 
 
 def test_release_date():
@@ -96,7 +130,12 @@ def test_release_date():
     assert compatibility.Check(
         package_name='test',
         package_version='0.1',
-        release_date=date(2021, 1, 1))
+        release_date=RELEASE_DATE)
+    # datetime object is reduced to a date
+    assert compatibility.Check(
+        package_name='test',
+        package_version='0.1',
+        release_date=datetime(2021, 1, 1, 12, 30)).release_date == RELEASE_DATE
     # valid string
     assert compatibility.Check(
         package_name='test',
@@ -114,6 +153,12 @@ def test_release_date():
             package_name='test',
             package_version='0.1',
             release_date='2021-13-01')
+    # other ISO 8601 formats are not accepted
+    with pytest.raises(ValueError):
+        compatibility.Check(
+            package_name='test',
+            package_version='0.1',
+            release_date='20210101')
 
 
 def test_python_versions_regex():
@@ -124,274 +169,195 @@ def test_python_versions_regex():
     valid_long = '3.8.final'
     invalid_short = '3.x'
     invalid_long = '3.8.x'
-    assert re.fullmatch(reg_ex, valid_short)
-    assert re.fullmatch(reg_ex, valid_short_b)
-    assert re.fullmatch(reg_ex, valid_short_c)
-    assert re.fullmatch(reg_ex, valid_long)
-    assert not (re.fullmatch(reg_ex, invalid_short))
-    assert not (re.fullmatch(reg_ex, invalid_long))
-
-
-def test_python_versions_as_parameters():
-    # python_version_support: missing key
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            python_version_support={
-                'min_version': '3.7',
-                'incompatible_versions': []
-            })
-    assert 'Parameter python_version_support incomplete!' in str(excinfo.value)
-
-    # python_version_support: additional key
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            python_version_support={
-                'min_version': '3.8',
-                'incompatible_versions': [],
-                'max_tested_version': '3.9',
-                'additional_key': '1.2'
-            })
-    assert 'Parameter python_version_support: too many keys!' in str(excinfo.value)
-
-    # python_version_support: right number of keys but contains unknown key
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            python_version_support={
-                'min_version': '3.8',
-                'incompatible_versions': [],
-                'unknown_key': '3.9'
-            })
-    assert 'Parameter python_version_support contains unknown keys.' in str(excinfo.value)
-
-    # python_version_support: wrong value for min_version
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            python_version_support={
-                'min_version': 'x.y',
-                'incompatible_versions': [],
-                'max_tested_version': '3.9'
-            })
-    assert 'Value for key min_version incorrect.' in str(excinfo.value)
-
-    # python_version_support: wrong value for max_tested_version
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            python_version_support={
-                'min_version': '3.8',
-                'incompatible_versions': [],
-                'max_tested_version': '3.x'
-            })
-    assert 'Value for key max_tested_version incorrect.' in str(excinfo.value)
-
-    # python_version_support: wrong version strings in incompatible_versions
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            python_version_support={
-                'min_version': '3.6',
-                'incompatible_versions': ['100.7.alpha', '100.8', 'foo'],
-                'max_tested_version': '3.9'
-            })
-    assert 'cannot be parsed.' in str(excinfo.value)
-
-
-def test_running_wrong_python():
-    # Instead of mocking, create a version string
-    # relative to the one running this test:
-    major = sys.version_info.major
-    minor = sys.version_info.minor
-    releaselevel = sys.version_info.releaselevel
-    running_version_short = f"{major}.{minor}"
-    running_version_long = f"{major}.{minor}.{releaselevel}"
-    version_minor_above = f"{major}.{minor + 1}"
-    version_major_above = f"{major + 1}.{minor}"
-    # running version is above max tested version
-    # TO Do : check if logging is called
-    # Minimal test version is 3.6, so 3.0
-    compatibility.Check(
-        package_name='test',
-        package_version='1',
-        release_date=date(2021, 1, 1),
-        python_version_support={
-            'min_version': '3.0',
-            'incompatible_versions': [],
-            'max_tested_version': '3.0'})
+    assert reg_ex.fullmatch(valid_short)
+    assert reg_ex.fullmatch(valid_short_b)
+    assert reg_ex.fullmatch(valid_short_c)
+    assert reg_ex.fullmatch(valid_long)
+    assert not (reg_ex.fullmatch(invalid_short))
+    assert not (reg_ex.fullmatch(invalid_long))
+
+
+@pytest.mark.parametrize("python_version_support,message", [
+    # missing key
+    ({'min_version': '3.7',
+      'incompatible_versions': []},
+     'Parameter python_version_support incomplete!'),
+    # additional key
+    ({'min_version': '3.8',
+      'incompatible_versions': [],
+      'max_tested_version': '3.9',
+      'additional_key': '1.2'},
+     'Parameter python_version_support: too many keys!'),
+    # right number of keys but contains unknown key
+    ({'min_version': '3.8',
+      'incompatible_versions': [],
+      'unknown_key': '3.9'},
+     'Parameter python_version_support contains unknown keys.'),
+    # wrong value for min_version
+    ({'min_version': 'x.y',
+      'incompatible_versions': [],
+      'max_tested_version': '3.9'},
+     'Value for key min_version incorrect.'),
+    # min_version is not a string
+    ({'min_version': 3.8,
+      'incompatible_versions': [],
+      'max_tested_version': '3.9'},
+     'Value for key min_version incorrect.'),
+    # wrong value for max_tested_version
+    ({'min_version': '3.8',
+      'incompatible_versions': [],
+      'max_tested_version': '3.x'},
+     'Value for key max_tested_version incorrect.'),
+    # wrong version strings in incompatible_versions
+    ({'min_version': '3.6',
+      'incompatible_versions': ['100.7.alpha', '100.8', 'foo'],
+      'max_tested_version': '3.9'},
+     'cannot be parsed.'),
+    # no string in incompatible_versions
+    ({'min_version': '3.6',
+      'incompatible_versions': [3.7],
+      'max_tested_version': '3.9'},
+     'cannot be parsed.'),
+])
+def test_python_versions_as_parameters(python_version_support, message,
+                                       check_factory):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        check_factory(python_version_support=python_version_support)
+
+
+@pytest.mark.parametrize("min_version,incompatible_versions", [
     # major version required is larger than version running
-    with pytest.raises(RuntimeError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            python_version_support={
-                'min_version': version_major_above,
-                'incompatible_versions': [],
-                'max_tested_version': '9.100'})
+    (VERSION_MAJOR_ABOVE, []),
     # minor version above is required
-    with pytest.raises(RuntimeError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            python_version_support={
-                'min_version': version_minor_above,
-                'incompatible_versions': [],
-                'max_tested_version': '9.100'})
-    # short form of running  version is in list of incompatible versions
-    with pytest.raises(RuntimeError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            python_version_support={
-                'min_version': '0.0',
-                'incompatible_versions': [running_version_short],
-                'max_tested_version': '9.100'})
-    # long form of running  version is in list of incompatible versions
+    (VERSION_MINOR_ABOVE, []),
+    # short form of running version is in list of incompatible versions
+    ('0.0', [RUNNING_VERSION_SHORT]),
+    # long form of running version is in list of incompatible versions
+    ('0.0', [RUNNING_VERSION_LONG]),
+])
+def test_running_wrong_python(min_version, incompatible_versions,
+                              check_factory):
+    # The case "running version is above max tested version" is covered
+    # by test_untested_interpreter_warning.
     with pytest.raises(RuntimeError):
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
+        check_factory(
             python_version_support={
-                'min_version': '0.0',
-                'incompatible_versions': [running_version_long],
+                'min_version': min_version,
+                'incompatible_versions': incompatible_versions,
                 'max_tested_version': '9.100'})
 
 
-def test_check_system(caplog):
-    caplog.set_level(logging.DEBUG)
+def test_check_system(monkeypatch, caplog, check_factory):
     # supported platform
-    with patch('platform.system') as system:
-        system.return_value = 'Linux'
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            system_support={'full': {'Linux'},
-                            'partial': set(),
-                            'incompatible': {'MacOS', 'Windows'}}
-            )
+    monkeypatch.setattr(platform, 'system', lambda: 'Linux')
+    check_factory(
+        system_support={'full': {'Linux'},
+                        'partial': set(),
+                        'incompatible': {'MacOS', 'Windows'}}
+        )
     assert 'fully supports Linux' in caplog.text
 
 
-def test_check_system_UNKNOWN_SUPPORT(caplog):
-    caplog.set_level(logging.DEBUG)
+def test_check_system_UNKNOWN_SUPPORT(monkeypatch, caplog, check_factory):
     # platform support unknown
-    with patch('platform.system') as system:
-        system.return_value = 'Linux'
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            system_support={'full': {'Windows'}}
-            )
+    monkeypatch.setattr(platform, 'system', lambda: 'Linux')
+    check_factory(
+        system_support={'full': {'Windows'}}
+        )
     assert 'support for Linux is unknown' in caplog.text
 
 
-def test_check_system_partial(caplog):
+def test_check_system_partial(monkeypatch, caplog, check_factory):
     # platform is listed under partial
-    with patch('platform.system') as system:
-        system.return_value = 'Linux'
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            system_support={'partial': {'Linux'}}
-            )
+    monkeypatch.setattr(platform, 'system', lambda: 'Linux')
+    check_factory(
+        system_support={'partial': {'Linux'}}
+        )
     assert 'has only partial support' in caplog.text
 
 
-def test_check_system_exceptions():
+def test_check_system_exceptions(check_factory):
     # not a dictionary
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            system_support='Linux')
-    assert 'must be a dictionary' in str(excinfo.value)
+    with pytest.raises(ValueError, match='must be a dictionary'):
+        check_factory(system_support='Linux')
     # unknown key in dict
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            system_support={'typo': {'foo'}})
-    assert 'Unknown key' in str(excinfo.value)
+    with pytest.raises(ValueError, match='Unknown key'):
+        check_factory(system_support={'typo': {'foo'}})
     # value for key is not a set
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            system_support={'full': ['Linux']})
-    assert 'Use a set to hold values' in str(excinfo.value)
+    with pytest.raises(ValueError, match='Use a set to hold values'):
+        check_factory(system_support={'full': ['Linux']})
     # Unknown system
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            system_support={'full': {'foo'}})
-    assert 'Invalid system' in str(excinfo.value)
-
-
-def test_check_system_incompatible_systems():
-    with patch('platform.system') as system:
-        system.return_value = 'Linux'
-        with pytest.raises(RuntimeError) as excinfo:
-            compatibility.Check(
-                package_name='test',
-                package_version='1',
-                release_date=date(2021, 1, 1),
-                system_support={'incompatible': {'Linux'}}
-                )
-        assert 'is incompatible' in str(excinfo.value)
-
-
-def test_check_system_CONTRADICTIONS():
-    with patch('platform.system') as system:
-        system.return_value = 'Windows'
-        # Cannot be incompatible and have full support
-        with pytest.raises(ValueError) as excinfo:
-            compatibility.Check(
-                package_name='test',
-                package_version='1',
-                release_date=date(2021, 1, 1),
-                system_support={'full': {'Windows'},
-                                'incompatible': {'Windows'}}
-                )
-        assert 'support AND be incompatible' in str(excinfo.value)
-        # cannot be fully and partialy supported
-        with pytest.raises(ValueError) as excinfo:
-            compatibility.Check(
-                package_name='test',
-                package_version='1',
-                release_date=date(2021, 1, 1),
-                system_support={'full': {'Windows'},
-                                'partial': {'Windows'}}
-                )
-        assert 'fully AND only partially supported' in str(excinfo.value)
-
-
-def test_check_version_age():
+    with pytest.raises(ValueError, match='Invalid system'):
+        check_factory(system_support={'full': {'foo'}})
+
+
+def test_check_system_incompatible_systems(monkeypatch, check_factory):
+    monkeypatch.setattr(platform, 'system', lambda: 'Linux')
+    with pytest.raises(RuntimeError, match='is incompatible'):
+        check_factory(
+            system_support={'incompatible': {'Linux'}}
+            )
+
+
+# system_support with frozensets as values, defined once as a constant
+SYSTEM_SUPPORT_FROZEN = {'full': frozenset({'Linux', 'MacOS'}),
+                         'incompatible': frozenset({'Windows'})}
+
+
+def test_check_system_frozenset(monkeypatch, caplog, check_factory):
+    monkeypatch.setattr(platform, 'system', lambda: 'Linux')
+    check_factory(system_support=SYSTEM_SUPPORT_FROZEN)
+    assert 'fully supports Linux' in caplog.text
+    monkeypatch.setattr(platform, 'system', lambda: 'Windows')
+    with pytest.raises(RuntimeError, match='is incompatible'):
+        check_factory(system_support=SYSTEM_SUPPORT_FROZEN)
+
+
+def test_check_system_CONTRADICTIONS(monkeypatch, check_factory):
+    monkeypatch.setattr(platform, 'system', lambda: 'Windows')
+    # Cannot be incompatible and have full support
+    with pytest.raises(ValueError, match='support AND be incompatible'):
+        check_factory(
+            system_support={'full': {'Windows'},
+                            'incompatible': {'Windows'}}
+            )
+    # cannot be fully and partialy supported
+    with pytest.raises(ValueError, match='fully AND only partially supported'):
+        check_factory(
+            system_support={'full': {'Windows'},
+                            'partial': {'Windows'}}
+            )
+
+
+@pytest.mark.parametrize("system_support,message", [
+    # different systems in full and incompatible
+    ({'full': {'Windows'}, 'incompatible': {'Linux'}},
+     'fully supports Windows'),
+    # empty sets do not overlap
+    ({'full': set(), 'incompatible': set()},
+     'support for Windows is unknown'),
+])
+def test_check_system_no_contradiction(system_support, message, monkeypatch,
+                                       caplog, check_factory):
+    monkeypatch.setattr(platform, 'system', lambda: 'Windows')
+    check_factory(system_support=system_support)
+    assert message in caplog.text
+
+
+# Note: Directly mocking datetime will fail, because it is C-Code !
+# Solution could be partial mocking, see.
+# https://docs.python.org/3/library/unittest.mock-examples.html#partial-mocking
+# However, it is simpler to calculate the release date relative to today.
+@pytest.mark.parametrize("days_since_release,nag_days,nag_in_hundred,nag", [
+    # nag_in_hundred is 0
+    (7, 1, 0, False),
+    # days since release below threshold
+    (7, 100, 100, False),
+    # days since release above threshold
+    (7, 3, 100, True),
+])
+def test_check_version_age(days_since_release, nag_days, nag_in_hundred, nag,
+                           caplog, check_factory):
 
 # Test *temporarily* disabled because if the guard clause is there, the mypy unreachable
 # code check, cannot be silenced and there is always an error.
@@ -403,100 +369,118 @@ def test_check_version_age():
 #        nag_over_update=None)
 #    my_check.check_version_age(None)
 
-    # nag_in_hundred is 0
-    compatibility.Check(
-        package_name='test',
-        package_version='1',
-        release_date=date(2021, 1, 1),
+    check_factory(
+        release_date=date.today() - timedelta(days=days_since_release),
         nag_over_update={
-            'nag_days_after_release': 1,
-            'nag_in_hundred': 0
+            'nag_days_after_release': nag_days,
+            'nag_in_hundred': nag_in_hundred
         })
+    assert ('There could be updates' in caplog.text) == nag
 
-    # negative value
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
-            nag_over_update={
-                'nag_days_after_release': -42,
-                'nag_in_hundred': 100
-            })
-    assert 'nag_days_after_release must not be negative.' in str(excinfo.value)
 
+@pytest.mark.parametrize("nag_days,nag_in_hundred,message", [
+    # negative value
+    (-42, 100, r'nag_days_after_release must not be negative\.'),
     # non integer value
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=date(2021, 1, 1),
+    ('foo', 100, 'Some key im nag_over_update has wrong type!'),
+    # nag_in_hundred negative
+    (3, -100, 'must be int between 0 and 100'),
+    # nag_in_hundred above 100
+    (3, 101, 'must be int between 0 and 100'),
+])
+def test_check_version_age_invalid(nag_days, nag_in_hundred, message,
+                                   check_factory):
+    with pytest.raises(ValueError, match=message):
+        check_factory(
             nag_over_update={
-                'nag_days_after_release': 'foo',
-                'nag_in_hundred': 100
+                'nag_days_after_release': nag_days,
+                'nag_in_hundred': nag_in_hundred
             })
-    assert 'Some key im nag_over_update has wrong type!' in str(excinfo.value)
 
-    # Note: Directly mocking datetime will fail, because it is C-Code !
-    # Solution could be partial mocking, see.
-    # https://docs.python.org/3/library/unittest.mock-examples.html#partial-mocking
-    # However, it is simpler to calculate the release date:
-    a_week_ago = date.today() - timedelta(days=7)
 
-    # days since release below threshold
-    compatibility.Check(
-        package_name='test',
-        package_version='1',
-        release_date=a_week_ago,
+def test_check_version_age_logging(caplog, check_factory):
+    # always nag
+    check_factory(
         nag_over_update={
-                'nag_days_after_release': 100,
+                'nag_days_after_release': 3,
                 'nag_in_hundred': 100
             })
+    assert 'There could be updates and security fixes' in caplog.text
 
-    # days since release above threshold
-    compatibility.Check(
-        package_name='test',
-        package_version='1',
-        release_date=a_week_ago,
+
+@pytest.mark.parametrize("draw,nag", [
+    # draw below nag_in_hundred
+    (49, True),
+    # draw equals nag_in_hundred
+    (50, False),
+])
+def test_check_version_age_random(draw, nag, caplog, monkeypatch,
+                                  check_factory):
+    monkeypatch.setattr(random, 'randrange', lambda stop: draw)
+    check_factory(
         nag_over_update={
                 'nag_days_after_release': 3,
-                'nag_in_hundred': 100
+                'nag_in_hundred': 50
             })
+    assert ('There could be updates' in caplog.text) == nag
 
-    # nag_in_hundred negative
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=a_week_ago,
-            nag_over_update={
-                    'nag_days_after_release': 3,
-                    'nag_in_hundred': -100
-                })
-    assert 'must be int between 0 and 100' in str(excinfo.value)
 
-    # nag_in_hundred above 100
-    with pytest.raises(ValueError) as excinfo:
-        compatibility.Check(
-            package_name='test',
-            package_version='1',
-            release_date=a_week_ago,
-            nag_over_update={
-                    'nag_days_after_release': 3,
-                    'nag_in_hundred': 101
-                })
-    assert 'must be int between 0 and 100' in str(excinfo.value)
+def test_check_cache(caplog):
+    parameters = {
+        'package_name': 'test',
+        'package_version': '1',
+        'release_date': RELEASE_DATE,
+        'python_version_support': {
+            'min_version': '3.0',
+            'incompatible_versions': ['2.7'],
+            'max_tested_version': '99.0'},
+        'system_support': {'full': {'Linux', 'MacOS', 'Windows'}}}
+    compatibility.Check(**parameters)
+    assert 'You are using test in version 1' in caplog.text
+    # same parameters: checks already passed, so no need to log again
+    caplog.clear()
+    compatibility.Check(**parameters)
+    assert 'You are using test in version 1' not in caplog.text
+    # different parameters
+    compatibility.Check(**{**parameters, 'package_version': '2'})
+    assert 'You are using test in version 2' in caplog.text
+    # after clearing the cache all checks run again
+    caplog.clear()
+    compatibility.Check.clear_cache()
+    compatibility.Check(**parameters)
+    assert 'You are using test in version 1' in caplog.text
+
+
+def test_check_cache_generator(check_factory):
+    "The cache key must not consume a generator the checks still need."
+    with pytest.raises(RuntimeError, match='not compatible'):
+        check_factory(python_version_support={
+            'min_version': '3.0',
+            'incompatible_versions': (v for v in [RUNNING_VERSION_SHORT]),
+            'max_tested_version': '99.0'})
 
 
-def test_check_version_age_logging(caplog):
-    caplog.set_level(logging.INFO)
-    # always nag
-    compatibility.Check(
-        package_name='test',
-        package_version='1',
-        release_date=date(2021, 1, 1),
-        nag_over_update={
-                'nag_days_after_release': 3,
-                'nag_in_hundred': 100
-            })
-    assert 'There could be updates and security fixes' in caplog.text
+@pytest.mark.parametrize("invalid_systems", [['Linux'], {'Linux': 1}])
+def test_check_cache_invalid_after_valid(invalid_systems, check_factory):
+    "An invalid value must not reuse the result of an equivalent valid one."
+    check_factory(system_support={'full': {'Linux'}})
+    with pytest.raises(ValueError, match='Use a set to hold values for full'):
+        check_factory(system_support={'full': invalid_systems})
+
+
+def test_untested_interpreter_warning(caplog, check_factory):
+    # running version is above max tested version
+    check_factory(
+        python_version_support={
+            'min_version': '3.0',
+            'incompatible_versions': [],
+            'max_tested_version': '3.0'})
+    assert 'higher than the versions' in caplog.text
+    # max tested version has a higher major version than the running one
+    caplog.clear()
+    check_factory(
+        python_version_support={
+            'min_version': '3.0',
+            'incompatible_versions': [],
+            'max_tested_version': '9.0'})
+    assert 'higher than the versions' not in caplog.text